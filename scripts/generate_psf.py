@@ -1,10 +1,81 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
 from thz_deconvolution import *
 
+
+def gauss_grid(start, step, width):
+    """
+    Creates a symmetric grid from -start to start and the Gaussian beam profile on it, normalized to a peak of 1.
+
+    The number of grid points is derived from the step, so the length does not depend on floating point round-off as
+    with np.arange.
+
+    Returns:
+    tuple: The grid and the normalized Gaussian.
+    """
+    n = int(round(2 * start / step)) + 1
+    grid = np.linspace(-start, start, n)
+    gauss = gaussian(grid, 0.0, width)
+    gauss = gauss / np.max(gauss)
+    return grid, gauss
+
+
+def disable_progress_bars():
+    """
+    Disables the tqdm progress bars in a worker process, the bars of the parallel fits would overwrite each other.
+    """
+    os.environ["TQDM_DISABLE"] = "1"
+
+
+def fit_half(half, x_psf, y_psf, np_psf_t_x, np_psf_t_y, times_psf, n_filters, win_width, low_cut, high_cut,
+             start_freq, end_freq, w_max, show):
+    """
+    Fits the mean PSF and the beam widths by frequency for one half of the knife edge measurements.
+
+    The printed progress is tagged with the name of the half, since both halves are fitted in parallel.
+
+    Returns:
+    tuple: The fitted x and y parameters per filter, the filters and the filter frequencies.
+    """
+    x_psf -= np.mean(x_psf)
+    y_psf -= np.mean(y_psf)
+
+    print()
+    print("* [" + half + "] Fitting the mean PSF")
+    n_min = 0
+    n_max = -1
+    x0, y0, popt_x, popt_y = fit_mean_beam(
+        x_psf, y_psf, np_psf_t_x, np_psf_t_y, [n_min, n_max], plot=show)
+
+    # Create the PSF
+    x_start = np.abs(x_psf[0])
+    y_start = np.abs(y_psf[0])
+    dx = np.abs(x_psf[1] - x_psf[0])
+    dy = np.abs(y_psf[1] - y_psf[0])
+    xx, gauss_x = gauss_grid(x_start, dx, popt_x[1])
+    yy, gauss_y = gauss_grid(y_start, dy, popt_y[1])
+
+    _, _, psf_2d = create_psf_2d(gauss_x, gauss_y, xx, yy, plot=False)
+
+    print()
+    print("* [" + half + "] Creating the filters for the PSF")
+    filters, filt_freqs = create_filters(
+        n_filters, times_psf, win_width, low_cut, high_cut, start_freq, end_freq, plot=show)
+
+    print()
+    print("* [" + half + "] Fitting the PSF beam widths by frequency")
+    n_min = 0
+    n_max = -1
+    _, _, popt_xs, popt_ys, _, _ = fit_beam_widths(
+        x0, y0, x_psf, y_psf, np_psf_t_x, np_psf_t_y, filters, filt_freqs, w_max, [n_min, n_max], plot=show)
+
+    return popt_xs, popt_ys, filters, filt_freqs
+
+
 if __name__ == "__main__":
     np.set_printoptions(precision=4)
 
@@ -40,8 +111,16 @@ if __name__ == "__main__":
         required=True,
         help="Path to the knife edge measurement file in y."
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Save the plot of the fit results to sample_data/psf.png instead of showing it (for headless runs)."
+    )
     args = parser.parse_args()
 
+    if args.batch:
+        plt.switch_backend("Agg")
+
     x_path = args.path_x
     y_path = args.path_y
 
@@ -56,55 +135,30 @@ if __name__ == "__main__":
     np_psf_t_x_lr = np.split(np_psf_t_x_lr, 2)
     np_psf_t_y_lr = np.split(np_psf_t_y_lr, 2)
 
-    # Flipping the left part
-    x_psf_lr[0] = -np.flip(x_psf_lr[0])
-    y_psf_lr[0] = -np.flip(y_psf_lr[0])
+    # Flipping the left part (np.split and np.flip return views, so the positions are negated in place)
+    x_psf_lr[0] = np.flip(x_psf_lr[0])
+    y_psf_lr[0] = np.flip(y_psf_lr[0])
+    x_psf_lr[0] *= -1
+    y_psf_lr[0] *= -1
     np_psf_t_x_lr[0] = np.flip(np_psf_t_x_lr[0])
     np_psf_t_y_lr[0] = np.flip(np_psf_t_y_lr[0])
 
-    popt_xs_lr = []
-    popt_ys_lr = []
-
-    for x_psf, y_psf, np_psf_t_x, np_psf_t_y in zip(x_psf_lr, y_psf_lr, np_psf_t_x_lr, np_psf_t_y_lr):
-        x_psf -= np.mean(x_psf)
-        y_psf -= np.mean(y_psf)
-
-        print()
-        print("* Fitting the mean PSF")
-        n_min = 0
-        n_max = -1
-        x0, y0, popt_x, popt_y = fit_mean_beam(
-            x_psf, y_psf, np_psf_t_x, np_psf_t_y, [n_min, n_max], plot=show)
-
-        # Create the PSF
-        x_start = np.abs(x_psf[0])
-        y_start = np.abs(y_psf[0])
-        dx = np.abs(x_psf[1] - x_psf[0])
-        dy = np.abs(y_psf[1] - y_psf[0])
-        xx = np.arange(-x_start, x_start + dx, dx)
-        yy = np.arange(-y_start, y_start + dy, dy)
-
-        gauss_x = gaussian(xx, 0.0, popt_x[1])
-        gauss_y = gaussian(yy, 0.0, popt_y[1])
-        gauss_x = gauss_x / np.max(gauss_x)
-        gauss_y = gauss_y / np.max(gauss_y)
-
-        _, _, psf_2d = create_psf_2d(gauss_x, gauss_y, xx, yy, plot=False)
-
-        print()
-        print("* Creating the filters for the PSF")
-        filters, filt_freqs = create_filters(
-            n_filters, times_psf, win_width, low_cut, high_cut, start_freq, end_freq, plot=show)
-
-        print()
-        print("* Fitting the PSF beam widths by frequency")
-        n_min = 0
-        n_max = -1
-        _, _, popt_xs, popt_ys, _, _ = fit_beam_widths(
-            x0, y0, x_psf, y_psf, np_psf_t_x, np_psf_t_y, filters, filt_freqs, w_max, [n_min, n_max], plot=show)
-
-        popt_xs_lr.append(popt_xs)
-        popt_ys_lr.append(popt_ys)
+    # The left and right halves are independent, fit them in parallel unless plots are shown
+    halves = list(zip(["left", "right"], x_psf_lr, y_psf_lr, np_psf_t_x_lr, np_psf_t_y_lr))
+    fit_args = (times_psf, n_filters, win_width, low_cut, high_cut, start_freq, end_freq, w_max, show)
+    if show:
+        results = [fit_half(*half, *fit_args) for half in halves]
+    else:
+        with ProcessPoolExecutor(max_workers=len(halves), initializer=disable_progress_bars) as executor:
+            futures = [executor.submit(fit_half, *half, *fit_args) for half in halves]
+            results = []
+            for (half, *_), future in zip(halves, futures):
+                results.append(future.result())
+                print("* Finished fitting the " + half + " half")
+
+    popt_xs_lr = [popt_xs for popt_xs, _, _, _ in results]
+    popt_ys_lr = [popt_ys for _, popt_ys, _, _ in results]
+    _, _, filters, filt_freqs = results[-1]
 
     popt_xs_lr = np.array(popt_xs_lr)
     popt_ys_lr = np.array(popt_ys_lr)
@@ -145,25 +199,33 @@ if __name__ == "__main__":
     print()
     print("* Data saved to sample_data/psf.npz")
 
-    plt.plot(filt_freqs, w_xs, 'C0')
-    plt.plot(filt_freqs, w_ys, 'C3')
-    plt.xlabel("Frequency [THz]")
-    plt.ylabel("Beam width [mm]")
-    plt.title("Beam width as a function of frequency")
-    plt.legend(["Beam width in x", "Beam width in y"])
-    plt.show()
-
     min_y_range = np.min([np.min(y0s), np.min(x0s)])
     max_y_range = np.max([np.max(y0s), np.max(x0s)])
 
     min_y_range = np.min([-5, min_y_range])
     max_y_range = np.max([5, max_y_range])
 
-    plt.plot(filt_freqs, x0s, 'C0')
-    plt.plot(filt_freqs, y0s, 'C3')
-    plt.ylim(min_y_range, max_y_range)
-    plt.xlabel("Frequency [THz]")
-    plt.ylabel("Position of the center [mm]")
-    plt.title("Center of the PSF as a function of frequency")
-    plt.legend(["Center of the PSF in x", "Center of the PSF in y"])
-    plt.show()
+    fig, (ax_w, ax_0) = plt.subplots(1, 2, figsize=(12, 4.5))
+
+    ax_w.plot(filt_freqs, w_xs, 'C0')
+    ax_w.plot(filt_freqs, w_ys, 'C3')
+    ax_w.set_xlabel("Frequency [THz]")
+    ax_w.set_ylabel("Beam width [mm]")
+    ax_w.set_title("Beam width as a function of frequency")
+    ax_w.legend(["Beam width in x", "Beam width in y"])
+
+    ax_0.plot(filt_freqs, x0s, 'C0')
+    ax_0.plot(filt_freqs, y0s, 'C3')
+    ax_0.set_ylim(min_y_range, max_y_range)
+    ax_0.set_xlabel("Frequency [THz]")
+    ax_0.set_ylabel("Position of the center [mm]")
+    ax_0.set_title("Center of the PSF as a function of frequency")
+    ax_0.legend(["Center of the PSF in x", "Center of the PSF in y"])
+
+    fig.tight_layout()
+
+    if args.batch:
+        fig.savefig(os.path.join(script_path, "../sample_data/psf.png"))
+        print("* Plot saved to sample_data/psf.png")
+    else:
+        plt.show()
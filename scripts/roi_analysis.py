@@ -1,22 +1,168 @@
+import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 from pydotthz import DotthzFile
-from shapely.geometry import Polygon, Point
 
 
-def extract_rois(path: Path, measurement_key: Optional[str] = None):
+def _boundary_mask(vertices: np.ndarray, height: int, width: int) -> np.ndarray:
     """
-    Extracts Regions of Interest (ROIs) from a DotthzFile and returns the pixel coordinates inside each ROI.
+    Marks the pixels lying exactly on one of the polygon edges.
+
+    The ROI vertices are usually integer pixel coordinates, so edges often pass through pixel centers. The pixels on
+    an edge are found per scanline, which costs O(N * height) instead of testing every pixel against every edge.
 
     Parameters:
-    path (Path): Path to the DotthzFile containing the image data.
+    vertices (np.ndarray): Polygon vertices as an (N, 2) array of (x, y) pixel coordinates.
+    height (int): Height of the image in pixels.
+    width (int): Width of the image in pixels.
+
+    Returns:
+    np.ndarray: Boolean mask where `mask[y, x]` is True for pixels on the polygon boundary.
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    eps = 1e-9
+
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if abs(y1 - y0) < eps:
+            # Horizontal edge: only touches pixels if it lies on a scanline
+            y = round(y0)
+            if abs(y0 - y) < eps and 0 <= y < height:
+                x_lo = max(int(np.ceil(min(x0, x1) - eps)), 0)
+                x_hi = min(int(np.floor(max(x0, x1) + eps)), width - 1)
+                mask[y, x_lo:x_hi + 1] = True
+            continue
+
+        y_lo = max(int(np.ceil(min(y0, y1) - eps)), 0)
+        y_hi = min(int(np.floor(max(y0, y1) + eps)), height - 1)
+        ys = np.arange(y_lo, y_hi + 1)
+        xs = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+        xs_round = np.round(xs)
+        on_pixel = (np.abs(xs - xs_round) < eps) & (xs_round >= 0) & (xs_round < width)
+        mask[ys[on_pixel], xs_round[on_pixel].astype(np.intp)] = True
+
+    return mask
+
+
+def _polygon_mask(vertices: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    Rasterizes a polygon into a boolean mask of shape (height, width) using an even-odd scanline test.
+
+    Only the pixels within the bounding box of the polygon are tested. The crossings of all polygon edges with
+    all scanlines are computed at once, and a pixel is inside if an odd number of crossings lie left of it.
+    Pixels on the boundary are not part of the polygon, like with Shapely's `Polygon.contains`.
+
+    Parameters:
+    vertices (np.ndarray): Polygon vertices as an (N, 2) array of (x, y) pixel coordinates.
+    height (int): Height of the image in pixels.
+    width (int): Width of the image in pixels.
+
+    Returns:
+    np.ndarray: Boolean mask where `mask[y, x]` is True for pixels strictly inside the polygon.
+    """
+    mask = np.zeros((height, width), dtype=bool)
+
+    x_lo, y_lo = np.maximum(np.ceil(vertices.min(axis=0)).astype(int), 0)
+    x_hi = min(int(np.floor(vertices[:, 0].max())), width - 1)
+    y_hi = min(int(np.floor(vertices[:, 1].max())), height - 1)
+    if x_lo > x_hi or y_lo > y_hi:
+        return mask
+
+    # Find the edges crossing each scanline, half-open in y so shared vertices are only counted once
+    ys = np.arange(y_lo, y_hi + 1, dtype=np.float64)
+    x0, y0 = vertices[:, 0], vertices[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    edges, rows = np.nonzero((y0[:, None] > ys) != (y1[:, None] > ys))
+    x_cross = x0[edges] + (ys[rows] - y0[edges]) * (x1[edges] - x0[edges]) / (y1[edges] - y0[edges])
+
+    # Flip the parity at the first pixel right of each crossing and accumulate it along the scanlines
+    n_cols = x_hi - x_lo + 1
+    cols = np.clip(np.ceil(x_cross) - x_lo, 0, n_cols).astype(np.intp)
+    crossings = np.zeros((len(ys), n_cols + 1), dtype=np.intp)
+    np.add.at(crossings, (rows, cols), 1)
+    mask[y_lo:y_hi + 1, x_lo:x_hi + 1] = np.cumsum(crossings[:, :n_cols], axis=1) % 2 == 1
+
+    # The parity test is only exact away from the edges, exclude the boundary pixels
+    mask &= ~_boundary_mask(vertices, height, width)
+    return mask
+
+
+def pack_mask(mask: np.ndarray) -> np.ndarray:
+    """
+    Packs an ROI mask into a bitmap with one bit per pixel.
+
+    Packed masks of the same shape can be combined directly, e.g. `np.bitwise_and(packed_a, packed_b)` for the
+    intersection of two ROIs, which processes eight pixels per byte.
+
+    Parameters:
+    mask (np.ndarray): Boolean mask of shape (height, width) as returned by `extract_rois`.
+
+    Returns:
+    np.ndarray: Packed mask of dtype uint8 and shape (height, ceil(width / 8)).
+    """
+    return np.packbits(mask, axis=1)
+
+
+def unpack_mask(packed: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    Unpacks a bitmap created by `pack_mask` into a boolean mask.
+
+    Parameters:
+    packed (np.ndarray): Packed mask of shape (height, ceil(width / 8)).
+    height (int): Height of the image in pixels.
+    width (int): Width of the image in pixels.
+
+    Returns:
+    np.ndarray: Boolean mask of shape (height, width).
+    """
+    return np.unpackbits(packed, axis=1, count=width).reshape(height, width).view(bool)
+
+
+def to_coord_list(mask: np.ndarray):
+    """
+    Converts an ROI mask into a list of pixel coordinates.
+
+    Parameters:
+    mask (np.ndarray): Boolean mask of shape (height, width) as returned by `extract_rois`.
+
+    Returns:
+    list: A list of (x, y) pixel coordinates inside the ROI, ordered row by row.
+    """
+    ys, xs = np.nonzero(mask)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def _metadata_int(metadata, key: str) -> int:
+    """
+    Reads an integer metadata entry, which is usually stored as a string like "40" but may also be "40.0".
+    """
+    value = metadata[key]
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return int(float(value))
+    return int(value)
+
+
+@lru_cache(maxsize=32)
+def _parse_rois(path: Path, mtime_ns: int, measurement_key: Optional[str]):
+    """
+    Reads the image dimensions and the ROI polygons of a measurement from a DotthzFile.
+
+    The result is cached. The modification time is part of the cache key, so a changed file is read again.
+
+    Parameters:
+    path (Path): Resolved path to the DotthzFile containing the image data.
+    mtime_ns (int): Modification time of the file in nanoseconds.
     measurement_key (Optional[str]): The key for selecting a specific measurement. Defaults to the first measurement.
 
     Returns:
-    dict: A dictionary mapping ROI labels to lists of pixel coordinates within each ROI.
+    tuple: The image height and width, and a tuple of (label, vertices) pairs with the vertices in image coordinates.
     """
-    rois = {}
+    rois = []
     with DotthzFile(path, "r") as image_file:
         # Read the measurement
         if measurement_key is None:
@@ -27,25 +173,69 @@ def extract_rois(path: Path, measurement_key: Optional[str] = None):
         metadata = image_file[measurement_key].metadata
 
         # Get image dimensions
-        height, width = int(float(metadata["height"])), int(float(metadata["width"]))
+        height, width = _metadata_int(metadata, "height"), _metadata_int(metadata, "width")
 
         # Extract and parse ROI polygon from metadata
         for (index, roi_label) in enumerate(metadata["ROI Labels"].split(",")):
-            roi_raw = metadata[f"ROI {index}"]  # Assuming ROI is stored as a string like "[[x1,y1],[x2,y2],...]"
-            roi_points = eval(roi_raw) if isinstance(roi_raw, str) else roi_raw  # Convert to list of lists
-            roi_points = list(roi_points)  # Ensure it's a list
+            roi_raw = metadata[f"ROI {index}"]  # ROI is stored as a string like "[x1,y1],[x2,y2],..."
+            if isinstance(roi_raw, str):
+                roi_raw = json.loads(f"[{roi_raw}]")  # Convert to list of lists
+            roi_points = np.asarray(roi_raw, dtype=np.float64).reshape(-1, 2)
 
             # Convert to image coordinate system (flip Y and swap x and y)
-            roi_points_corrected = [(width - 1 - y, x) for x, y in roi_points]
-            polygon = Polygon(roi_points_corrected)
+            roi_points_corrected = np.empty_like(roi_points)
+            roi_points_corrected[:, 0] = width - 1 - roi_points[:, 1]
+            roi_points_corrected[:, 1] = roi_points[:, 0]
+            roi_points_corrected.flags.writeable = False
+            rois.append((roi_label, roi_points_corrected))
 
-            # Find all pixels inside the ROI
-            pixels_inside_roi = [
-                (x, y) for y in range(height) for x in range(width) if polygon.contains(Point(x, y))
-            ]
-            rois[roi_label] = pixels_inside_roi
+    return height, width, tuple(rois)
+
+
+@lru_cache(maxsize=32)
+def _cached_polygon_mask(vertices: bytes, height: int, width: int) -> np.ndarray:
+    """
+    Cached version of `_polygon_mask`, keyed by the raw float64 bytes of the vertices.
+
+    The returned mask is read-only since it is shared between calls.
+    """
+    mask = _polygon_mask(np.frombuffer(vertices, dtype=np.float64).reshape(-1, 2), height, width)
+    mask.flags.writeable = False
+    return mask
+
+
+def extract_rois(path: Path, measurement_key: Optional[str] = None, packed: bool = False):
+    """
+    Extracts Regions of Interest (ROIs) from a DotthzFile and returns a pixel mask for each ROI.
+
+    The masks can be used to index the image data directly, e.g. `image[mask]`. Use `to_coord_list`
+    to obtain the list of pixel coordinates instead. The parsed polygons and the masks are cached, so
+    repeated calls for the same file are cheap. The returned masks are read-only, copy them before
+    modifying them in place. For many or large images, `packed=True` returns the masks as bitmaps with one bit
+    per pixel, see `pack_mask` and `unpack_mask`.
+
+    Parameters:
+    path (Path): Path to the DotthzFile containing the image data.
+    measurement_key (Optional[str]): The key for selecting a specific measurement. Defaults to the first measurement.
+    packed (bool): Return the masks packed with `pack_mask`. Defaults to False.
+
+    Returns:
+    dict: A dictionary mapping ROI labels to boolean masks of shape (height, width), where
+    `mask[y, x]` is True for pixels inside the ROI, or to packed masks of shape (height, ceil(width / 8)).
+    """
+    path = Path(path).resolve()
+    height, width, parsed_rois = _parse_rois(path, path.stat().st_mtime_ns, measurement_key)
+
+    # Find all pixels inside each ROI
+    rois = {
+        roi_label: _cached_polygon_mask(vertices.tobytes(), height, width)
+        for roi_label, vertices in parsed_rois
+    }
 
     if len(rois) == 0:
         raise Exception(f"No ROIs found in {path}")
 
-    return rois  # Returns list of pixel coordinates
+    if packed:
+        rois = {roi_label: pack_mask(mask) for roi_label, mask in rois.items()}
+
+    return rois  # Returns boolean masks of the pixels inside each ROI
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from roi_analysis import _polygon_mask
+
+# Pixel counts of the previous per-pixel `Polygon.contains(Point(x, y))` loop on a 12x12 image,
+# boundary pixels are not part of the ROI
+BASELINE_COUNTS = [
+    ([(2, 2), (8, 2), (8, 8), (2, 8)], 25),
+    ([(0, 0), (11, 0), (11, 11), (0, 11)], 100),
+    ([(1, 1), (9, 1), (5, 7)], 19),
+    ([(1, 1), (10, 2), (3, 9)], 31),
+]
+
+
+@pytest.mark.parametrize("vertices, expected", BASELINE_COUNTS)
+def test_polygon_mask_matches_baseline_counts(vertices, expected):
+    mask = _polygon_mask(np.array(vertices, dtype=np.float64), 12, 12)
+    assert mask.sum() == expected
+
+
+def test_polygon_mask_excludes_boundary():
+    mask = _polygon_mask(np.array([(2, 2), (8, 2), (8, 8), (2, 8)], dtype=np.float64), 12, 12)
+    expected = np.zeros((12, 12), dtype=bool)
+    expected[3:8, 3:8] = True
+    np.testing.assert_array_equal(mask, expected)
+
+
+def test_polygon_mask_outside_image():
+    mask = _polygon_mask(np.array([(-8, -8), (-2, -8), (-2, -2)], dtype=np.float64), 12, 12)
+    assert not mask.any()
+
+
+def test_polygon_mask_matches_shapely():
+    shapely = pytest.importorskip("shapely")
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        height, width = rng.integers(5, 40, size=2)
+        if i % 2:
+            vertices = rng.integers(-5, 45, size=(rng.integers(3, 8), 2)).astype(np.float64)
+        else:
+            vertices = rng.uniform(-5, 45, size=(rng.integers(3, 8), 2))
+        polygon = shapely.Polygon(vertices)
+        if not polygon.is_valid:
+            continue
+        ys, xs = np.mgrid[0:height, 0:width]
+        np.testing.assert_array_equal(_polygon_mask(vertices, height, width), shapely.contains_xy(polygon, xs, ys))
@@ -905,8 +905,8 @@ impl Filter for Deconvolution {
 
                 // Evaluate PSF parameters at this filter's center frequency
                 let center_freq = center_frequencies[i];
-                let wx = gui_settings.psf.wx_fit.eval_single(center_freq);
-                let wy = gui_settings.psf.wy_fit.eval_single(center_freq);
+                let wx = wx_values[i];
+                let wy = wy_values[i];
                 let x0 = gui_settings
                     .psf
                     .x0_spline
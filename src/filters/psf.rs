@@ -1,7 +1,94 @@
 use interp1d::Interp1d;
-use ndarray::{Array1, Array2};
+use ndarray::{Array1, Array2, ArrayView1};
+use num_traits::Float;
 use serde::{Deserialize, Serialize};
 
+/// Spacing of spline knots, detected once when the spline is built to guess segments in O(1)
+#[derive(Serialize, Deserialize, Default, PartialEq, Debug, Clone, Copy)]
+pub enum KnotSpacing<F> {
+    /// No regular spacing, segments are found by binary search
+    #[default]
+    Uneven,
+    /// Evenly spaced knots `start + i * step`
+    Linear { start: F, step: F },
+    /// Logarithmically spaced knots `exp(log_start + i * log_step)`, as created by `FrequencySpacing::Log`
+    Log { log_start: F, log_step: F },
+}
+
+impl<F: Float> KnotSpacing<F> {
+    /// Detect whether the (sorted) knots are evenly spaced on a linear or logarithmic axis
+    pub fn detect(knots: ArrayView1<F>) -> Self {
+        let n = knots.len();
+        if n < 2 {
+            return Self::Uneven;
+        }
+        let segments = F::from(n - 1).unwrap();
+        let tolerance = F::from(1e-3).unwrap();
+
+        let step = (knots[n - 1] - knots[0]) / segments;
+        if (1..n).all(|i| (knots[i] - knots[i - 1] - step).abs() <= tolerance * step) {
+            return Self::Linear {
+                start: knots[0],
+                step,
+            };
+        }
+
+        if knots[0] > F::zero() {
+            let log_start = knots[0].ln();
+            let log_step = (knots[n - 1].ln() - log_start) / segments;
+            if (1..n).all(|i| {
+                (knots[i].ln() - knots[i - 1].ln() - log_step).abs() <= tolerance * log_step
+            }) {
+                return Self::Log {
+                    log_start,
+                    log_step,
+                };
+            }
+        }
+
+        Self::Uneven
+    }
+
+    /// Find the segment containing `x`, assuming `knots[0] <= x <= knots[n - 1]`
+    ///
+    /// For regularly spaced knots the segment is computed directly and only verified against the
+    /// neighbouring knots, the binary search is the fallback for uneven knots and rounding misses.
+    pub fn find_segment(&self, knots: ArrayView1<F>, x: F) -> usize {
+        let n = knots.len();
+        if n < 2 {
+            return 0;
+        }
+        let last = n - 2;
+
+        let position = match *self {
+            Self::Linear { start, step } => Some((x - start) / step),
+            Self::Log {
+                log_start,
+                log_step,
+            } => Some((x.ln() - log_start) / log_step),
+            Self::Uneven => None,
+        };
+        if let Some(position) = position {
+            let guess = position.to_usize().unwrap_or(0).min(last);
+            if knots[guess] <= x && (guess == last || x < knots[guess + 1]) {
+                return guess;
+            }
+        }
+
+        let mut left = 0;
+        let mut right = n - 1;
+        while right - left > 1 {
+            let mid = (left + right) / 2;
+            if knots[mid] > x {
+                right = mid;
+            } else {
+                left = mid;
+            }
+        }
+        left
+    }
+}
+
 /// Cubic spline interpolation coefficients for a single curve
 #[derive(Serialize, Deserialize, Default, PartialEq, Debug, Clone)]
 pub struct CubicSplineCoeffs {
@@ -11,6 +98,8 @@ pub struct CubicSplineCoeffs {
     pub coeff_b: Array1<f32>, // b coefficient for each segment
     pub coeff_c: Array1<f32>, // c coefficient for each segment
     pub coeff_d: Array1<f32>, // d coefficient for each segment
+    #[serde(default)]
+    pub spacing: KnotSpacing<f32>, // spacing of the knots for the segment lookup
 }
 
 /// Hybrid fit: physical model (a/f + b) + spline correction for optical defects
@@ -22,6 +111,39 @@ pub struct HybridFit {
 }
 
 impl CubicSplineCoeffs {
+    /// Create the spline from its knots and segment coefficients, detecting the knot spacing
+    pub fn new(
+        knots: Array1<f32>,
+        values: Array1<f32>,
+        coeff_a: Array1<f32>,
+        coeff_b: Array1<f32>,
+        coeff_c: Array1<f32>,
+        coeff_d: Array1<f32>,
+    ) -> Self {
+        let spacing = KnotSpacing::detect(knots.view());
+        Self {
+            knots,
+            values,
+            coeff_a,
+            coeff_b,
+            coeff_c,
+            coeff_d,
+            spacing,
+        }
+    }
+
+    /// Evaluate the polynomial of segment `i` at offset `dx` from its knot (Horner form)
+    #[inline]
+    fn eval_segment(&self, i: usize, dx: f32) -> f32 {
+        self.coeff_a[i] + dx * (self.coeff_b[i] + dx * (self.coeff_c[i] + dx * self.coeff_d[i]))
+    }
+
+    /// Evaluate the first derivative of segment `i` at offset `dx` from its knot
+    #[inline]
+    fn eval_segment_slope(&self, i: usize, dx: f32) -> f32 {
+        self.coeff_b[i] + dx * (2.0 * self.coeff_c[i] + dx * 3.0 * self.coeff_d[i])
+    }
+
     /// Evaluate spline at a single point with constrained extrapolation
     pub fn eval_single(&self, x: f32) -> f32 {
         let n = self.knots.len();
@@ -46,37 +168,19 @@ impl CubicSplineCoeffs {
             let i = n - 2;
             let dx_end = self.knots[n - 1] - self.knots[i];
             // Evaluate value and derivative at right endpoint
-            let y_end = self.coeff_a[i]
-                + self.coeff_b[i] * dx_end
-                + self.coeff_c[i] * dx_end * dx_end
-                + self.coeff_d[i] * dx_end * dx_end * dx_end;
-            let slope_end = self.coeff_b[i]
-                + 2.0 * self.coeff_c[i] * dx_end
-                + 3.0 * self.coeff_d[i] * dx_end * dx_end;
+            let y_end = self.eval_segment(i, dx_end);
+            let slope_end = self.eval_segment_slope(i, dx_end);
             let dx = x - self.knots[n - 1];
             let y_extrap = y_end + slope_end * dx;
             // Ensure positive for beam width (w > 0) only in extrapolation
             return y_extrap.max(1e-6);
         }
 
-        // Interpolation: binary search for the right segment
-        let mut left = 0;
-        let mut right = n - 1;
-        while right - left > 1 {
-            let mid = (left + right) / 2;
-            if self.knots[mid] > x {
-                right = mid;
-            } else {
-                left = mid;
-            }
-        }
+        // Interpolation: find the right segment
+        let left = self.spacing.find_segment(self.knots.view(), x);
 
         // Evaluate polynomial (no clamping in interpolation region)
-        let dx = x - self.knots[left];
-        self.coeff_a[left]
-            + self.coeff_b[left] * dx
-            + self.coeff_c[left] * dx * dx
-            + self.coeff_d[left] * dx * dx * dx
+        self.eval_segment(left, x - self.knots[left])
     }
 
     /// Evaluate spline with constant extrapolation (for x0/y0 positions)
@@ -96,24 +200,11 @@ impl CubicSplineCoeffs {
             return self.values[n - 1];
         }
 
-        // Interpolation: binary search for the right segment
-        let mut left = 0;
-        let mut right = n - 1;
-        while right - left > 1 {
-            let mid = (left + right) / 2;
-            if self.knots[mid] > x {
-                right = mid;
-            } else {
-                left = mid;
-            }
-        }
+        // Interpolation: find the right segment
+        let left = self.spacing.find_segment(self.knots.view(), x);
 
         // Evaluate polynomial
-        let dx = x - self.knots[left];
-        self.coeff_a[left]
-            + self.coeff_b[left] * dx
-            + self.coeff_c[left] * dx * dx
-            + self.coeff_d[left] * dx * dx * dx
+        self.eval_segment(left, x - self.knots[left])
     }
 }
 
@@ -163,13 +254,8 @@ impl HybridFit {
             let i = n - 2;
             let dx_end = self.correction.knots[n - 1] - self.correction.knots[i];
             // Evaluate value and derivative at right endpoint
-            let y_end = self.correction.coeff_a[i]
-                + self.correction.coeff_b[i] * dx_end
-                + self.correction.coeff_c[i] * dx_end * dx_end
-                + self.correction.coeff_d[i] * dx_end * dx_end * dx_end;
-            let slope_end = self.correction.coeff_b[i]
-                + 2.0 * self.correction.coeff_c[i] * dx_end
-                + 3.0 * self.correction.coeff_d[i] * dx_end * dx_end;
+            let y_end = self.correction.eval_segment(i, dx_end);
+            let slope_end = self.correction.eval_segment_slope(i, dx_end);
             // Maximum allowed slope to keep total derivative <= 0
             let max_slope = self.base_a / (f * f);
             let safe_slope = slope_end.min(max_slope);
@@ -330,3 +416,71 @@ pub fn gaussian(x: &Array1<f32>, params: &[f32]) -> Array1<f32> {
         (2.0 / std::f32::consts::PI).sqrt() * (-2.0 * (xi - x0).powf(2.0) / (w * w)).exp() / w
     })
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Reference segment lookup by bisection over the knots
+    fn bisect_segment(knots: &[f32], x: f32) -> usize {
+        (knots.partition_point(|&k| k <= x) - 1).min(knots.len() - 2)
+    }
+
+    fn assert_segments_match(knots: &[f32]) {
+        let knots = Array1::from_vec(knots.to_vec());
+        let spacing = KnotSpacing::detect(knots.view());
+        let n = knots.len();
+        for i in 0..=1000 {
+            let x = knots[0] + (knots[n - 1] - knots[0]) * i as f32 / 1000.0;
+            let expected = bisect_segment(knots.as_slice().unwrap(), x);
+            assert_eq!(
+                spacing.find_segment(knots.view(), x),
+                expected,
+                "wrong segment for x = {} with {:?} knots",
+                x,
+                spacing
+            );
+        }
+        for &k in knots.iter() {
+            assert_eq!(
+                spacing.find_segment(knots.view(), k),
+                bisect_segment(knots.as_slice().unwrap(), k)
+            );
+        }
+    }
+
+    #[test]
+    fn test_find_segment_log_spaced() {
+        // Default filter bank: 20 logarithmically spaced frequencies from 0.15 to 5.0 THz
+        let knots: Vec<f32> = (0..20)
+            .map(|i| {
+                (0.15_f64.ln() + i as f64 * (5.0_f64.ln() - 0.15_f64.ln()) / 19.0).exp() as f32
+            })
+            .collect();
+        assert!(matches!(
+            KnotSpacing::detect(ArrayView1::from(&knots[..])),
+            KnotSpacing::Log { .. }
+        ));
+        assert_segments_match(&knots);
+    }
+
+    #[test]
+    fn test_find_segment_linear_spaced() {
+        let knots: Vec<f32> = (0..20).map(|i| 0.15 + i as f32 * 0.25).collect();
+        assert!(matches!(
+            KnotSpacing::detect(ArrayView1::from(&knots[..])),
+            KnotSpacing::Linear { .. }
+        ));
+        assert_segments_match(&knots);
+    }
+
+    #[test]
+    fn test_find_segment_uneven() {
+        let knots: [f32; 8] = [0.1, 0.12, 0.5, 0.55, 1.3, 2.0, 2.05, 4.8];
+        assert_eq!(
+            KnotSpacing::detect(ArrayView1::from(&knots[..])),
+            KnotSpacing::Uneven
+        );
+        assert_segments_match(&knots);
+    }
+}
@@ -200,14 +200,14 @@ pub fn psf_tool_system(
 /// Converts PSF tool [`CurveFits`] (f64) into the main app [`PSF`] struct (f32).
 fn curve_fits_to_psf(cf: &crate::psf_tool::curve_fitting::CurveFits) -> PSF {
     fn spline_to_coeffs(s: &crate::psf_tool::curve_fitting::CubicSpline) -> CubicSplineCoeffs {
-        CubicSplineCoeffs {
-            knots: Array1::from_vec(s.x.iter().map(|&v| v as f32).collect()),
-            values: Array1::from_vec(s.y.iter().map(|&v| v as f32).collect()),
-            coeff_a: Array1::from_vec(s.coeffs.iter().map(|c| c[0] as f32).collect()),
-            coeff_b: Array1::from_vec(s.coeffs.iter().map(|c| c[1] as f32).collect()),
-            coeff_c: Array1::from_vec(s.coeffs.iter().map(|c| c[2] as f32).collect()),
-            coeff_d: Array1::from_vec(s.coeffs.iter().map(|c| c[3] as f32).collect()),
-        }
+        CubicSplineCoeffs::new(
+            Array1::from_vec(s.x.iter().map(|&v| v as f32).collect()),
+            Array1::from_vec(s.y.iter().map(|&v| v as f32).collect()),
+            Array1::from_vec(s.coeffs.iter().map(|c| c[0] as f32).collect()),
+            Array1::from_vec(s.coeffs.iter().map(|c| c[1] as f32).collect()),
+            Array1::from_vec(s.coeffs.iter().map(|c| c[2] as f32).collect()),
+            Array1::from_vec(s.coeffs.iter().map(|c| c[3] as f32).collect()),
+        )
     }
 
     fn hybrid_to_main(h: &crate::psf_tool::curve_fitting::HybridFit) -> HybridFit {
@@ -225,14 +225,14 @@ pub fn load_psf(file_path: &PathBuf) -> Result<PSF, Box<dyn Error>> {
         let coeff_c = load_1d_array(npz, &format!("{}_coeff_c", prefix))?;
         let coeff_d = load_1d_array(npz, &format!("{}_coeff_d", prefix))?;
 
-        Ok(crate::filters::psf::CubicSplineCoeffs {
-            knots: knots.map(|&x| x as f32),
-            values: values.map(|&x| x as f32),
-            coeff_a: coeff_a.map(|&x| x as f32),
-            coeff_b: coeff_b.map(|&x| x as f32),
-            coeff_c: coeff_c.map(|&x| x as f32),
-            coeff_d: coeff_d.map(|&x| x as f32),
-        })
+        Ok(crate::filters::psf::CubicSplineCoeffs::new(
+            knots.map(|&x| x as f32),
+            values.map(|&x| x as f32),
+            coeff_a.map(|&x| x as f32),
+            coeff_b.map(|&x| x as f32),
+            coeff_c.map(|&x| x as f32),
+            coeff_d.map(|&x| x as f32),
+        ))
     };
 
     // Helper function to load a hybrid fit from npz
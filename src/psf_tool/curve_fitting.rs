@@ -1,3 +1,5 @@
+use crate::filters::psf::KnotSpacing;
+use ndarray::ArrayView1;
 use serde::{Deserialize, Serialize};
 
 /// Hybrid fit: physical model (a/f + b) + spline correction for optical defects
@@ -92,14 +94,9 @@ impl HybridFit {
             // Right extrapolation
             let i = n - 2;
             let dx_end = self.correction.x[n - 1] - self.correction.x[i];
-            let coeffs = &self.correction.coeffs[i];
             // Evaluate value and derivative at right endpoint
-            let y_end = coeffs[0]
-                + coeffs[1] * dx_end
-                + coeffs[2] * dx_end * dx_end
-                + coeffs[3] * dx_end * dx_end * dx_end;
-            let slope_end =
-                coeffs[1] + 2.0 * coeffs[2] * dx_end + 3.0 * coeffs[3] * dx_end * dx_end;
+            let y_end = self.correction.eval_segment(i, dx_end);
+            let slope_end = self.correction.eval_segment_slope(i, dx_end);
             // Maximum allowed slope to keep total derivative <= 0
             let max_slope = self.a / (f * f);
             let safe_slope = slope_end.min(max_slope);
@@ -137,6 +134,8 @@ pub struct CubicSpline {
     pub x: Vec<f64>,
     pub y: Vec<f64>,
     pub coeffs: Vec<[f64; 4]>, // [a, b, c, d] for each segment
+    #[serde(default)]
+    pub spacing: KnotSpacing<f64>, // spacing of the knots for the segment lookup
 }
 
 impl CubicSpline {
@@ -211,10 +210,12 @@ impl CubicSpline {
             coeffs.push([a_coeff, b_coeff, c_coeff, d_coeff]);
         }
 
+        let spacing = KnotSpacing::detect(ArrayView1::from(&x_sorted[..]));
         Ok(Self {
             x: x_sorted,
             y: y_sorted,
             coeffs,
+            spacing,
         })
     }
 
@@ -232,6 +233,20 @@ impl CubicSpline {
             .collect()
     }
 
+    /// Evaluate the polynomial of segment `i` at offset `dx` from its knot (Horner form)
+    #[inline]
+    fn eval_segment(&self, i: usize, dx: f64) -> f64 {
+        let [a, b, c, d] = self.coeffs[i];
+        a + dx * (b + dx * (c + dx * d))
+    }
+
+    /// Evaluate the first derivative of segment `i` at offset `dx` from its knot
+    #[inline]
+    fn eval_segment_slope(&self, i: usize, dx: f64) -> f64 {
+        let [_, b, c, d] = self.coeffs[i];
+        b + dx * (2.0 * c + dx * 3.0 * d)
+    }
+
     /// Evaluate spline at a single point with constrained extrapolation
     fn eval_single(&self, x: f64) -> f64 {
         let n = self.x.len();
@@ -252,36 +267,20 @@ impl CubicSpline {
             // Right extrapolation: use linear extrapolation based on tangent at x[n-1]
             let i = n - 2;
             let dx_end = self.x[n - 1] - self.x[i];
-            let coeffs = &self.coeffs[i];
             // Evaluate value and derivative at right endpoint
-            let y_end = coeffs[0]
-                + coeffs[1] * dx_end
-                + coeffs[2] * dx_end * dx_end
-                + coeffs[3] * dx_end * dx_end * dx_end;
-            let slope_end =
-                coeffs[1] + 2.0 * coeffs[2] * dx_end + 3.0 * coeffs[3] * dx_end * dx_end;
+            let y_end = self.eval_segment(i, dx_end);
+            let slope_end = self.eval_segment_slope(i, dx_end);
             let dx = x - self.x[n - 1];
             let y_extrap = y_end + slope_end * dx;
             // Ensure positive for beam width (w > 0) only in extrapolation
             return y_extrap.max(1e-6);
         }
 
-        // Interpolation: binary search for the right segment
-        let mut left = 0;
-        let mut right = n - 1;
-        while right - left > 1 {
-            let mid = (left + right) / 2;
-            if self.x[mid] > x {
-                right = mid;
-            } else {
-                left = mid;
-            }
-        }
+        // Interpolation: find the right segment
+        let left = self.spacing.find_segment(ArrayView1::from(&self.x[..]), x);
 
         // Evaluate polynomial (no clamping in interpolation region)
-        let dx = x - self.x[left];
-        let coeffs = &self.coeffs[left];
-        coeffs[0] + coeffs[1] * dx + coeffs[2] * dx * dx + coeffs[3] * dx * dx * dx
+        self.eval_segment(left, x - self.x[left])
     }
 
     /// Evaluate spline with constant extrapolation (for x0/y0 positions)
@@ -297,22 +296,11 @@ impl CubicSpline {
             return self.y[n - 1];
         }
 
-        // Interpolation: binary search for the right segment
-        let mut left = 0;
-        let mut right = n - 1;
-        while right - left > 1 {
-            let mid = (left + right) / 2;
-            if self.x[mid] > x {
-                right = mid;
-            } else {
-                left = mid;
-            }
-        }
+        // Interpolation: find the right segment
+        let left = self.spacing.find_segment(ArrayView1::from(&self.x[..]), x);
 
         // Evaluate polynomial
-        let dx = x - self.x[left];
-        let coeffs = &self.coeffs[left];
-        coeffs[0] + coeffs[1] * dx + coeffs[2] * dx * dx + coeffs[3] * dx * dx * dx
+        self.eval_segment(left, x - self.x[left])
     }
 }
 
@@ -489,4 +477,44 @@ mod tests {
         );
         // Right extrapolation should continue the trend
     }
+
+    #[test]
+    fn test_cubic_spline_uneven_knots() {
+        // Uneven knots must not rely on a spacing guess, compare against a bisection over the knots
+        let x = vec![0.15, 0.18, 0.4, 0.45, 1.2, 2.6, 2.65, 5.0];
+        let y: Vec<f64> = x.iter().map(|&xi| 1.0 / xi).collect();
+
+        let spline = CubicSpline::fit(&x, &y).unwrap();
+        assert!(matches!(spline.spacing, KnotSpacing::Uneven));
+
+        for i in 0..=1000 {
+            let xt = x[0] + (x[x.len() - 1] - x[0]) * i as f64 / 1000.0;
+            let expected = (x.partition_point(|&k| k <= xt) - 1).min(x.len() - 2);
+            let segment = spline
+                .spacing
+                .find_segment(ArrayView1::from(&spline.x[..]), xt);
+            assert_eq!(segment, expected, "wrong segment for x = {}", xt);
+        }
+    }
+
+    #[test]
+    fn test_cubic_spline_log_knots() {
+        // Logarithmically spaced knots as created by the default filter bank
+        let x: Vec<f64> = (0..20)
+            .map(|i| (0.15_f64.ln() + i as f64 * (5.0_f64.ln() - 0.15_f64.ln()) / 19.0).exp())
+            .collect();
+        let y: Vec<f64> = x.iter().map(|&xi| 1.0 / xi).collect();
+
+        let spline = CubicSpline::fit(&x, &y).unwrap();
+        assert!(matches!(spline.spacing, KnotSpacing::Log { .. }));
+
+        for i in 0..=1000 {
+            let xt = x[0] + (x[x.len() - 1] - x[0]) * i as f64 / 1000.0;
+            let expected = (x.partition_point(|&k| k <= xt) - 1).min(x.len() - 2);
+            let segment = spline
+                .spacing
+                .find_segment(ArrayView1::from(&spline.x[..]), xt);
+            assert_eq!(segment, expected, "wrong segment for x = {}", xt);
+        }
+    }
 }
@@ -40,10 +40,11 @@ pub fn export_to_npz(path: &Path, curve_fits: &CurveFits) -> Result<()> {
     let mut zip = zip::ZipWriter::new(writer);
 
     // Helper function to write array to NPZ
+    // Entries are stored uncompressed like `np.savez`, so reading an array needs no inflating
     let write_array =
         |zip: &mut zip::ZipWriter<BufWriter<File>>, name: &str, data: &[f64]| -> Result<()> {
             let options: zip::write::FileOptions<()> = zip::write::FileOptions::default()
-                .compression_method(zip::CompressionMethod::Deflated);
+                .compression_method(zip::CompressionMethod::Stored);
             zip.start_file(format!("{}.npy", name), options)?;
 
             // Write numpy array header manually
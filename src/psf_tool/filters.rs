@@ -1,5 +1,6 @@
 use ndarray::{Array1, Array2};
 use num_complex::Complex64;
+use realfft::RealFftPlanner;
 use serde::{Deserialize, Serialize};
 use std::f64::consts::PI;
 
@@ -277,28 +278,32 @@ pub fn create_filters(params: &FilterParams, times: &[f64]) -> Filters {
 }
 
 /// Compute frequency response of a filter
+///
+/// The response at `k * fs / (2 * n_points)` is bin `k` of a DFT of length `2 * n_points`, so it is
+/// computed with a single real FFT instead of evaluating the DTFT at every frequency.
 pub fn frequency_response(filter_coeffs: &[f64], n_points: usize, fs: f64) -> (Vec<f64>, Vec<f64>) {
-    let mut frequencies = Vec::with_capacity(n_points);
-    let mut magnitudes = Vec::with_capacity(n_points);
+    let frequencies: Vec<f64> = (0..n_points)
+        .map(|k| k as f64 * fs / (2.0 * n_points as f64))
+        .collect();
 
-    for k in 0..n_points {
-        let freq = k as f64 * fs / (2.0 * n_points as f64);
-        frequencies.push(freq);
+    if n_points == 0 {
+        return (frequencies, Vec::new());
+    }
 
-        let omega = 2.0 * PI * freq / fs;
+    let mut real_planner = RealFftPlanner::<f64>::new();
+    let r2c = real_planner.plan_fft_forward(2 * n_points);
+    let mut input_vec = r2c.make_input_vec();
+    let mut spectrum = r2c.make_output_vec();
 
-        let mut real = 0.0;
-        let mut imag = 0.0;
+    // Taps beyond the FFT length alias onto the same frequency grid
+    let n_fft = input_vec.len();
+    for (n, &h_n) in filter_coeffs.iter().enumerate() {
+        input_vec[n % n_fft] += h_n;
+    }
 
-        for (n, &h_n) in filter_coeffs.iter().enumerate() {
-            let arg = -omega * n as f64;
-            real += h_n * arg.cos();
-            imag += h_n * arg.sin();
-        }
+    r2c.process(&mut input_vec, &mut spectrum).unwrap();
 
-        let magnitude = (real * real + imag * imag).sqrt();
-        magnitudes.push(magnitude);
-    }
+    let magnitudes = spectrum.iter().take(n_points).map(|c| c.norm()).collect();
 
     (frequencies, magnitudes)
 }
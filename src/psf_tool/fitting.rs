@@ -1,6 +1,9 @@
 use ndarray::{Array1, Array2};
+use num_complex::Complex64;
+use realfft::{ComplexToReal, RealFftPlanner, RealToComplex};
 use serde::{Deserialize, Serialize};
 use std::f64::consts::PI;
+use std::sync::Arc;
 
 /// Error function approximation
 pub fn erf(x: f64) -> f64 {
@@ -140,11 +143,14 @@ fn fit_error_function(
         bounds,
     };
 
+    // Stop once the simplex has converged instead of iterating down to machine precision
     let solver = NelderMead::new(vec![
         vec![initial_guess[0], initial_guess[1]],
         vec![initial_guess[0] + 0.1, initial_guess[1]],
         vec![initial_guess[0], initial_guess[1] + 0.1],
-    ]);
+    ])
+    .with_sd_tolerance(1e-10)
+    .map_err(|e| format!("Invalid solver settings: {}", e))?;
 
     let res = Executor::new(cost, solver)
         .configure(|state| state.max_iters(8000))
@@ -262,7 +268,8 @@ pub fn fit_mean_beam(
     })
 }
 
-/// Convolve signal with filter (simple implementation matching scipy mode='same')
+/// Convolve signal with filter (direct implementation matching scipy mode='same', reference for the tests)
+#[cfg(test)]
 pub fn convolve(signal: &[f64], filter: &[f64]) -> Vec<f64> {
     let n_signal = signal.len();
     let n_filter = filter.len();
@@ -283,6 +290,100 @@ pub fn convolve(signal: &[f64], filter: &[f64]) -> Vec<f64> {
     result
 }
 
+/// Time traces prepared for filtering with a whole filter bank
+///
+/// The spectra of the traces are computed once and reused for every filter, so filtering all traces
+/// with one filter costs a spectral product and an inverse real FFT per trace instead of a direct
+/// convolution.
+struct TraceFilterBank {
+    spectra: Vec<Vec<Complex64>>,
+    n_signal: usize,
+    r2c: Arc<dyn RealToComplex<f64>>,
+    c2r: Arc<dyn ComplexToReal<f64>>,
+}
+
+impl TraceFilterBank {
+    fn new(traces: &Array2<f64>, n_filter: usize) -> Self {
+        let n_signal = traces.ncols();
+
+        // Zero padding to the full convolution length avoids circular wrap-around
+        let n_fft = (n_signal + n_filter).next_power_of_two();
+        let mut real_planner = RealFftPlanner::<f64>::new();
+        let r2c = real_planner.plan_fft_forward(n_fft);
+        let c2r = real_planner.plan_fft_inverse(n_fft);
+
+        let spectra = traces
+            .rows()
+            .into_iter()
+            .map(|row| {
+                let mut input_vec = r2c.make_input_vec();
+                for (x, &v) in input_vec.iter_mut().zip(row.iter()) {
+                    *x = v;
+                }
+                let mut spectrum = r2c.make_output_vec();
+                r2c.process(&mut input_vec, &mut spectrum).unwrap();
+                spectrum
+            })
+            .collect();
+
+        Self {
+            spectra,
+            n_signal,
+            r2c,
+            c2r,
+        }
+    }
+
+    /// Filter all traces, equivalent to calling `convolve` on every row
+    fn apply(&self, filter: &[f64]) -> Array2<f64> {
+        let n_fft = self.r2c.len();
+        let n_filter = filter.len();
+
+        // `convolve` correlates with the filter, which is a convolution with the reversed filter
+        let mut input_vec = self.r2c.make_input_vec();
+        for (x, &h) in input_vec.iter_mut().zip(filter.iter().rev()) {
+            *x = h;
+        }
+        let mut filter_spectrum = self.r2c.make_output_vec();
+        self.r2c
+            .process(&mut input_vec, &mut filter_spectrum)
+            .unwrap();
+
+        // Start of the 'same' section within the full convolution
+        let offset = n_filter - 1 - n_filter / 2;
+        let scale = 1.0 / n_fft as f64;
+
+        let mut filtered = Array2::zeros((self.spectra.len(), self.n_signal));
+        let mut spectrum = self.c2r.make_input_vec();
+        let mut output = self.c2r.make_output_vec();
+        for (mut filtered_row, trace_spectrum) in
+            filtered.rows_mut().into_iter().zip(self.spectra.iter())
+        {
+            for ((s, &t), &h) in spectrum
+                .iter_mut()
+                .zip(trace_spectrum.iter())
+                .zip(filter_spectrum.iter())
+            {
+                *s = t * h;
+            }
+            // The DC and Nyquist bins of a real signal have no imaginary part
+            let last = spectrum.len() - 1;
+            spectrum[0].im = 0.0;
+            spectrum[last].im = 0.0;
+
+            self.c2r.process(&mut spectrum, &mut output).unwrap();
+            for (y, &v) in filtered_row
+                .iter_mut()
+                .zip(output[offset..offset + self.n_signal].iter())
+            {
+                *y = v * scale;
+            }
+        }
+
+        filtered
+    }
+}
+
 /// Fit beam widths for each filter frequency
 pub fn fit_beam_widths<F>(
     mean_fit: &MeanBeamFit,
@@ -324,6 +425,10 @@ where
     let mut bounds_x = ([-range_max / 2.0, 0.01], [range_max / 2.0, w_max]);
     let mut bounds_y = ([-range_max / 2.0, 0.01], [range_max / 2.0, w_max]);
 
+    // Transform the traces once, they are filtered with every filter of the bank
+    let x_filter_bank = TraceFilterBank::new(x_traces, filters.ncols());
+    let y_filter_bank = TraceFilterBank::new(y_traces, filters.ncols());
+
     for nf in 0..n_filters {
         println!(
             "[DEBUG] fit_beam_widths: Processing filter {}/{}",
@@ -332,25 +437,9 @@ where
         );
         let filter_coeffs = filters.row(nf).to_vec();
 
-        // Filter X traces
-        let mut filtered_x_traces = Array2::zeros(x_traces.dim());
-        for i in 0..x_traces.nrows() {
-            let signal = x_traces.row(i).to_vec();
-            let filtered = convolve(&signal, &filter_coeffs);
-            for (j, &val) in filtered.iter().enumerate() {
-                filtered_x_traces[[i, j]] = val;
-            }
-        }
-
-        // Filter Y traces
-        let mut filtered_y_traces = Array2::zeros(y_traces.dim());
-        for i in 0..y_traces.nrows() {
-            let signal = y_traces.row(i).to_vec();
-            let filtered = convolve(&signal, &filter_coeffs);
-            for (j, &val) in filtered.iter().enumerate() {
-                filtered_y_traces[[i, j]] = val;
-            }
-        }
+        // Filter X and Y traces
+        let filtered_x_traces = x_filter_bank.apply(&filter_coeffs);
+        let filtered_y_traces = y_filter_bank.apply(&filter_coeffs);
 
         // Compute intensities
         let intensity_x = compute_intensity(&filtered_x_traces);
@@ -440,3 +529,40 @@ where
         y_positions_right: None,
     })
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_trace_filter_bank_matches_convolve() {
+        let n_signal = 64;
+        let traces = Array2::from_shape_fn((3, n_signal), |(i, j)| {
+            ((i + 1) as f64 * 0.3 * j as f64).sin() + 0.01 * j as f64
+        });
+
+        // Odd and even filter lengths, including filters longer than the traces
+        for n_filter in [1, 8, 15, 99] {
+            let filter: Vec<f64> = (0..n_filter)
+                .map(|j| (j as f64 * 0.7).cos() / (j + 1) as f64)
+                .collect();
+
+            let filter_bank = TraceFilterBank::new(&traces, n_filter);
+            let filtered = filter_bank.apply(&filter);
+
+            for (i, row) in traces.rows().into_iter().enumerate() {
+                let expected = convolve(&row.to_vec(), &filter);
+                for (j, &e) in expected.iter().enumerate() {
+                    assert!(
+                        (filtered[[i, j]] - e).abs() < 1e-10,
+                        "Filtered trace {} at {} should be {}, got {}",
+                        i,
+                        j,
+                        e,
+                        filtered[[i, j]]
+                    );
+                }
+            }
+        }
+    }
+}